@@ -1,10 +1,17 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import joblib
+import xgboost as xgb
+import base64
+import io
 import os
-from datetime import datetime
+import sqlite3
+import threading
 import time
-from github import Github  # PyGithub
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import requests
 from streamlit_star_rating import st_star_rating
 
 # -----------------------------
@@ -16,8 +23,13 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# -----------------------------
+# Static page chrome (built once at import, re-emitted as-is each rerun
+# so Streamlit's diff sees identical elements and skips re-rendering)
+# -----------------------------
+
 # Force dark theme + Supabase-inspired emerald green + glassmorphism
-st.markdown("""
+PAGE_CSS = """
     <style>
         /* Main background */
         .stApp {
@@ -82,35 +94,351 @@ st.markdown("""
         
         hr { border-color: #334155; }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+TITLE_HTML = """
+    <div class="glass-card">
+        <h1 style='text-align: center; color: #34d399; text-shadow: 0 4px 15px rgba(52,211,153,0.4);'>
+            🛒 E-Commerce Product Return Risk Predictor
+        </h1>
+        <h3 style='text-align: center; color: #94a3b8;'>
+            Predict if a customer is likely to return their order
+        </h3>
+    </div>
+"""
+
+# Result card, precompiled once; only the three dynamic values are
+# substituted per prediction.
+RESULT_CARD_TMPL = """
+    <div style='text-align: center; padding: 40px; border-radius: 24px;
+                background: linear-gradient(135deg, {bg_color}, #1e293b);
+                backdrop-filter: blur(12px); box-shadow: 0 12px 30px rgba(0,0,0,0.5);
+                border: 1px solid rgba(255,255,255,0.1);'>
+        <h1 style='margin:0; font-size: 72px; color: white; text-shadow: 0 4px 20px rgba(0,0,0,0.6);'>
+            {prob:.1%}
+        </h1>
+        <h3 style='margin:10px 0; color: #e2e8f0;'>Probability of Return</h3>
+        <h2 style='margin:15px 0; color: {label_color};'>
+            {label}
+        </h2>
+    </div>
+"""
+
+# Fully specialized variants: one branch picks the template, one format
+# call fills in the probability.
+HTML_HIGH_RISK = (RESULT_CARD_TMPL
+                  .replace("{bg_color}", "#f87171")
+                  .replace("{label_color}", "#fbbf24")
+                  .replace("{label}", "Return Likely"))
+HTML_LOW_RISK = (RESULT_CARD_TMPL
+                 .replace("{bg_color}", "#34d399")
+                 .replace("{label_color}", "#ffffff")
+                 .replace("{label}", "Return Unlikely"))
+
+FOOTER_HTML = """
+    <div class='glass-card' style='text-align: center; padding: 1.5rem; margin-top: 3rem;'>
+        <p style='color: #94a3b8; font-size: 14px; margin:5px;'>
+            <strong>Data Science Assignment 4</strong> | BSCS-F22 | Instructor: Ghulam Ali<br>
+            Model: Linear Regression | Dataset: Online Retail (UCI/Kaggle)<br>
+            Deployment: Streamlit Cloud | Version 1.0 — December 2025
+        </p>
+    </div>
+"""
+
+st.markdown(PAGE_CSS, unsafe_allow_html=True)
 
 # -----------------------------
 # Load Model & Preprocessors
 # -----------------------------
+class BoosterModel:
+    """Thin predict_proba adapter over a native xgboost.Booster.
+
+    Keeps the familiar predict_proba(...)[0][1] call sites working while
+    inference goes through inplace_predict, which skips both the sklearn
+    wrapper and per-call DMatrix construction.
+    """
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    def predict_proba(self, X):
+        p = self.booster.inplace_predict(np.ascontiguousarray(X, dtype=np.float32))
+        return np.stack([1.0 - p, p], axis=1)
+
+
 @st.cache_resource
 def load_artifacts():
     base_path = os.path.dirname(__file__)
-    model = joblib.load(os.path.join(base_path, "xgb_model.pkl"))
-    scaler = joblib.load(os.path.join(base_path, "scaler.pkl"))
-    le_category = joblib.load(os.path.join(base_path, "le_category.pkl"))
-    le_country = joblib.load(os.path.join(base_path, "le_country.pkl"))
-    return model, scaler, le_category, le_country
+    ubj_path = os.path.join(base_path, "xgb_model.ubj")
+    if not os.path.exists(ubj_path):
+        # One-time migration from the legacy joblib pickle: the native
+        # UBJSON booster is smaller and far faster to parse.
+        joblib.load(os.path.join(base_path, "xgb_model.pkl")).get_booster().save_model(ubj_path)
+    booster = xgb.Booster()
+    booster.load_model(ubj_path)
+    # Single-row inference: one thread beats OpenMP fork/join across all
+    # cores, and a throwaway predict pays the lazy thread-pool init cost
+    # here (once per process) instead of on the first user click.
+    booster.set_param({"nthread": 1})
+    model = BoosterModel(booster)
+    # The first few inplace_predict calls are slower while lazy
+    # buffers/threading settle; a few throwaway rows reach steady state
+    # before the first real click.
+    _warm = np.zeros((1, 9), dtype=np.float32)
+    for _ in range(3):
+        model.predict_proba(_warm)
+    # mmap_mode="r" lets the OS page cache back any joblib-stored numpy
+    # arrays, so multiple worker processes share one copy instead of
+    # each unpickling its own.
+    scaler = joblib.load(os.path.join(base_path, "scaler.pkl"), mmap_mode="r")
+    le_category = joblib.load(os.path.join(base_path, "le_category.pkl"), mmap_mode="r")
+    le_country = joblib.load(os.path.join(base_path, "le_country.pkl"), mmap_mode="r")
+    # Precomputed label -> index maps: O(1) dict lookups instead of
+    # LabelEncoder.transform's searchsorted + array allocation per click.
+    cat_map = {c: i for i, c in enumerate(le_category.classes_)}
+    country_map = {c: i for i, c in enumerate(le_country.classes_)}
+    # StandardScaler reduced to a precomputed affine transform:
+    # x * inv_scale + scale_bias == (x - mean_) / scale_, without
+    # sklearn's per-call validation and extra allocations.
+    inv_scale = (1.0 / scaler.scale_).astype(np.float32)
+    scale_bias = (-scaler.mean_ * inv_scale).astype(np.float32)
+    # Plain tuples hash much faster than the encoders' numpy arrays when
+    # Streamlit fingerprints the selectbox options each rerun.
+    cat_options = tuple(le_category.classes_.tolist())
+    country_options = tuple(le_country.classes_.tolist())
+    return (model, scaler, le_category, le_country, cat_map, country_map,
+            inv_scale, scale_bias, cat_options, country_options)
+
+(model, scaler, le_category, le_country, cat_map, country_map,
+ inv_scale, scale_bias, cat_options, country_options) = load_artifacts()
+
+
+@st.cache_resource
+def get_executor():
+    """Shared prediction pool: the booster runs with nthread=1 and
+    releases the GIL inside C++, so concurrent sessions scale across
+    cores instead of serializing on one OpenMP pool."""
+    return ThreadPoolExecutor(max_workers=os.cpu_count())
+
+executor = get_executor()
 
-model, scaler, le_category, le_country = load_artifacts()
+# Balloons/snow ship a sizeable animation payload over the websocket on
+# every trigger, so they are opt-in per session.
+st.sidebar.checkbox("🎉 Celebration animations", value=False, key="celebrations")
+
+# -----------------------------
+# Feedback Storage (GitHub-backed)
+# -----------------------------
+FEEDBACK_FILE = "feedback.csv"
+GITHUB_API = "https://api.github.com"
+
+# Flush the local queue to GitHub once this many rows are waiting, or
+# when the previous flush is at least this old - whichever comes first.
+FLUSH_BATCH_ROWS = 5
+FLUSH_MAX_AGE = 300  # seconds
+
+# Fixed schema: explicit dtypes let read_csv skip per-column inference.
+FEEDBACK_DTYPES = {
+    'Name': 'string',
+    'Usability_Rating': 'int8',
+    'Accuracy_Relevance_Rating': 'int8',
+    'Suggestions': 'string',
+    'Timestamp': 'string',
+}
+
+@st.cache_resource
+def _feedback_runtime():
+    """Process-wide feedback bookkeeping.
+
+    A plain module global would be rebuilt on every script run (each
+    run executes in a fresh namespace), so the last-known
+    (sha, text, etag) of feedback.csv and the lock serializing flushes
+    live behind st.cache_resource like the other shared handles.
+    """
+    return {}, threading.Lock()
+
+
+_feedback_state, _flush_lock = _feedback_runtime()
+
+
+@st.cache_resource
+def get_github_session():
+    """One keep-alive requests.Session per process for the GitHub API."""
+    session = requests.Session()
+    session.headers.update({
+        "Authorization": f"token {st.secrets['GITHUB_TOKEN']}",
+        "Accept": "application/vnd.github+json",
+    })
+    return session
+
+
+def _feedback_url():
+    return f"{GITHUB_API}/repos/{st.secrets['GITHUB_USERNAME']}/{st.secrets['REPO_NAME']}/contents/{FEEDBACK_FILE}"
+
+
+def _fetch_feedback_contents():
+    """Return (sha, csv_text) of feedback.csv, or (None, '') if absent.
+
+    Sends the last ETag as If-None-Match; the common no-new-feedback
+    case is a 304 with no body, answered from the local copy.
+    """
+    branch = st.secrets.get("BRANCH", "main")
+    headers = {}
+    if "etag" in _feedback_state:
+        headers["If-None-Match"] = _feedback_state["etag"]
+    resp = get_github_session().get(_feedback_url(), params={"ref": branch},
+                                    headers=headers, timeout=10)
+    if resp.status_code == 304:
+        if "sha" in _feedback_state and "text" in _feedback_state:
+            return _feedback_state["sha"], _feedback_state["text"]
+        # A stray ETag without a cached body must never wedge the fetch:
+        # drop it and refetch unconditionally.
+        _feedback_state.pop("etag", None)
+        return _fetch_feedback_contents()
+    if resp.status_code == 404:
+        return None, ''
+    resp.raise_for_status()
+    payload = resp.json()
+    sha = payload["sha"]
+    text = base64.b64decode(payload["content"]).decode('utf-8')
+    # Keep etag, sha and text together so a later 304 always has a
+    # local copy to answer from, whichever caller fetched first.
+    _feedback_state["etag"] = resp.headers.get("ETag")
+    _feedback_state["sha"], _feedback_state["text"] = sha, text
+    return sha, text
+
+
+@st.cache_data(ttl=15, max_entries=1, show_spinner=False)
+def load_feedback():
+    """Fetch the feedback table from GitHub, cached across reruns."""
+    sha, text = _fetch_feedback_contents()
+    if sha is None:
+        raise FileNotFoundError(FEEDBACK_FILE)
+    return pd.read_csv(io.StringIO(text), dtype=FEEDBACK_DTYPES, engine='c')
+
+
+@st.cache_resource
+def get_feedback_db():
+    """Local SQLite queue for submitted feedback.
+
+    Submits are a single O(1) INSERT with no network on the hot path;
+    the background flusher drains the queue to GitHub (the durable
+    shared store) and rows survive a process restart if a flush fails.
+    """
+    conn = sqlite3.connect(os.path.join(os.path.dirname(__file__), "feedback.db"),
+                           check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS pending_feedback("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "name TEXT, usability INT, accuracy INT, suggestions TEXT, ts TEXT)"
+    )
+    conn.commit()
+    return conn
+
+
+def _push_feedback():
+    """Flush all queued feedback rows to GitHub in a single commit.
+
+    Runs in a background thread so the submit handler returns
+    immediately instead of blocking the script-runner on the GitHub
+    API round-trip. Uses the cached sha/text when available, so the
+    usual cost is one PUT; a stale sha triggers one GET + retry.
+    Queued rows are deleted only after a successful upload.
+    """
+    with _flush_lock:
+        conn = get_feedback_db()
+        queued = conn.execute(
+            "SELECT id, name, usability, accuracy, suggestions, ts "
+            "FROM pending_feedback ORDER BY id"
+        ).fetchall()
+        if not queued:
+            return
+        rows = [
+            {
+                "Name": q[1],
+                "Usability_Rating": q[2],
+                "Accuracy_Relevance_Rating": q[3],
+                "Suggestions": q[4],
+                "Timestamp": q[5],
+            }
+            for q in queued
+        ]
+        if not _upload_feedback(rows):
+            # Best-effort: rows stay queued and are retried on the next
+            # submission.
+            return
+        conn.execute("DELETE FROM pending_feedback WHERE id <= ?", (queued[-1][0],))
+        conn.commit()
+
+
+def _maybe_flush_feedback():
+    """Kick off a background flush when a batch threshold is met.
+
+    Called from the submit handler and from the periodic feedback-table
+    fragment, so rows queued below the batch size still reach GitHub
+    once FLUSH_MAX_AGE passes even if nobody submits again.
+    """
+    conn = get_feedback_db()
+    queued = conn.execute("SELECT COUNT(*) FROM pending_feedback").fetchone()[0]
+    if not queued:
+        return
+    now = time.time()
+    if (queued >= FLUSH_BATCH_ROWS
+            or now - _feedback_state.get("last_flush", 0.0) >= FLUSH_MAX_AGE):
+        if _flush_lock.locked():
+            # A flush is already draining the queue; it will pick these
+            # rows up, so don't stack another thread behind the lock.
+            return
+        _feedback_state["last_flush"] = now
+        threading.Thread(target=_push_feedback, daemon=True).start()
+        load_feedback.clear()
+
+
+def _upload_feedback(rows):
+    """Append rows to feedback.csv on GitHub; True on success."""
+    try:
+        session = get_github_session()
+        branch = st.secrets.get("BRANCH", "main")
+        new_df = pd.DataFrame.from_records(rows)
+        new_lines = new_df.to_csv(index=False, header=False)
+
+        for attempt in range(2):
+            sha = _feedback_state.get("sha")
+            existing = _feedback_state.get("text", '')
+            if sha is None:
+                sha, existing = _fetch_feedback_contents()
+            # Append only the new rows to the existing text instead of
+            # re-parsing and re-serializing the whole file with pandas.
+            if existing and not existing.endswith('\n'):
+                existing += '\n'
+            updated = existing + new_lines if existing else new_df.to_csv(index=False)
+
+            body = {
+                "message": f"New feedback ({len(rows)} entries)",
+                "content": base64.b64encode(updated.encode('utf-8')).decode('ascii'),
+                "branch": branch,
+            }
+            if sha:
+                body["sha"] = sha
+            resp = session.put(_feedback_url(), json=body, timeout=10)
+            if resp.status_code in (409, 422) and attempt == 0:
+                # Someone else pushed since our cached sha; refetch and retry.
+                _feedback_state.clear()
+                continue
+            resp.raise_for_status()
+            _feedback_state["sha"] = resp.json()["content"]["sha"]
+            _feedback_state["text"] = updated
+            # The stored ETag described the pre-push content.
+            _feedback_state.pop("etag", None)
+            return True
+    except Exception:
+        pass
+    return False
 
 # -----------------------------
 # Title
 # -----------------------------
-st.markdown("""
-    <div class="glass-card">
-        <h1 style='text-align: center; color: #34d399; text-shadow: 0 4px 15px rgba(52,211,153,0.4);'>
-            🛒 E-Commerce Product Return Risk Predictor
-        </h1>
-        <h3 style='text-align: center; color: #94a3b8;'>
-            Predict if a customer is likely to return their order
-        </h3>
-    </div>
-""", unsafe_allow_html=True)
+st.markdown(TITLE_HTML, unsafe_allow_html=True)
 
 # -----------------------------
 # Model Metrics
@@ -122,222 +450,253 @@ MODEL_METRICS = {
     "AUC Score": "0.91"
 }
 
+# Metrics grid rendered as plain divs (styled by the .stMetric CSS) so
+# the whole post-prediction readout ships as one element instead of a
+# header plus four st.metric deltas.
+METRICS_HTML = (
+    "<h4 style='text-align: center;'>🔬 Model Performance Metrics (Test Set)</h4>"
+    "<div style='display: flex; gap: 10px; justify-content: center;'>"
+    + "".join(
+        f"<div class='stMetric' style='flex: 1; text-align: center;'>"
+        f"<span style='color: #94a3b8; font-size: 14px;'>{label}</span><br>"
+        f"<span style='font-size: 22px; font-weight: bold;'>{value}</span></div>"
+        for label, value in MODEL_METRICS.items()
+    )
+    + "</div>"
+)
+
+VERDICT_HIGH_HTML = (
+    "<div class='glass-card' style='padding: 1rem; text-align: center;'>"
+    "<p style='color: #f87171; margin: 5px;'>⚠️ High Risk! This order may be returned.</p>"
+    "<p style='color: #fbbf24; margin: 5px;'><strong>Recommendation</strong>: "
+    "Enhance product photos, detailed sizing charts, or clear material "
+    "description for this category.</p></div>"
+)
+VERDICT_LOW_HTML = (
+    "<div class='glass-card' style='padding: 1rem; text-align: center;'>"
+    "<p style='color: #34d399; margin: 5px;'>🎉 Low Risk! This order is likely to be kept.</p>"
+    "<p style='color: #e2e8f0; margin: 5px;'><strong>Great choice!</strong> "
+    "High customer satisfaction expected.</p></div>"
+)
+
 # -----------------------------
 # Prediction Section
 # -----------------------------
-st.header("Enter Product & Order Details")
-
-col1, col2 = st.columns(2)
-with col1:
-    category = st.selectbox("Product Category", options=le_category.classes_, index=0)
-    unit_price = st.number_input("Unit Price (£)", min_value=0.0, max_value=500.0, value=5.0, step=0.5)
-    total_price = st.number_input("Approximate Total Order Value (£)", min_value=0.0, max_value=1000.0, value=50.0, step=5.0)
-    customer_return_rate = st.slider("Customer's Past Return Rate (%)", 0.0, 20.0, 1.7,
-                                     help="Historical return behavior of this customer")
-with col2:
-    country = st.selectbox("Customer Country", options=le_country.classes_, index=0)
-    month = st.selectbox("Month of Purchase", options=list(range(1, 13)),
-                         format_func=lambda x: datetime(2025, x, 1).strftime('%B'))
-    is_holiday = st.checkbox("Holiday Season (Nov-Dec)", value=False)
-    is_weekend = st.checkbox("Weekend Order", value=False)
-
-if st.button("🔍 Predict Return Chance", type="primary", use_container_width=True):
-    with st.spinner("Analyzing order details and predicting risk..."):
-        time.sleep(1.5)
-        input_data = pd.DataFrame({
-            'UnitPrice': [unit_price],
-            'TotalPrice': [total_price],
-            'Month': [month],
-            'Hour': [12],
-            'IsWeekend': [int(is_weekend)],
-            'IsHolidaySeason': [int(is_holiday)],
-            'CustomerReturnRate': [customer_return_rate / 100],
-            'Category': [le_category.transform([category])[0]],
-            'Country': [le_country.transform([country])[0]]
-        })
-        scaled_input = scaler.transform(input_data)
-        return_probability = model.predict_proba(scaled_input)[0][1]
-        prediction = "Return Likely" if return_probability > 0.05 else "Return Unlikely"
-
-    st.markdown("<br>", unsafe_allow_html=True)
-    st.markdown(f"""
-        <div style='text-align: center; padding: 40px; border-radius: 24px;
-                    background: linear-gradient(135deg, {'#f87171' if return_probability > 0.05 else '#34d399'}, #1e293b);
-                    backdrop-filter: blur(12px); box-shadow: 0 12px 30px rgba(0,0,0,0.5);
-                    border: 1px solid rgba(255,255,255,0.1);'>
-            <h1 style='margin:0; font-size: 72px; color: white; text-shadow: 0 4px 20px rgba(0,0,0,0.6);'>
-                {return_probability:.1%}
-            </h1>
-            <h3 style='margin:10px 0; color: #e2e8f0;'>Probability of Return</h3>
-            <h2 style='margin:15px 0; color: {'#fbbf24' if return_probability > 0.05 else '#ffffff'};'>
-                {prediction}
-            </h2>
-        </div>
-    """, unsafe_allow_html=True)
-
-    if return_probability <= 0.05:
-        st.success("🎉 Low Risk! This order is likely to be kept.")
-        st.balloons()
-    else:
-        st.error("⚠️ High Risk! This order may be returned.")
-        st.snow()
-
-    if return_probability > 0.05:
-        st.warning("**Recommendation**: Enhance product photos, detailed sizing charts, or clear material description for this category.")
-    else:
-        st.success("**Great choice!** High customer satisfaction expected.")
-
-    st.markdown("<h4 style='text-align: center;'>🔬 Model Performance Metrics (Test Set)</h4>", unsafe_allow_html=True)
-    colm1, colm2, colm3, colm4 = st.columns(4)
-    colm1.metric("Accuracy", MODEL_METRICS["Accuracy"])
-    colm2.metric("Precision (Returns)", MODEL_METRICS["Precision (Return Class)"])
-    colm3.metric("Recall (Returns)", MODEL_METRICS["Recall (Return Class)"])
-    colm4.metric("AUC Score", MODEL_METRICS["AUC Score"])
-
-st.markdown("</div>", unsafe_allow_html=True)
+MONTHS = tuple(range(1, 13))
+MONTH_NAMES = [datetime(2025, m, 1).strftime('%B') for m in MONTHS]
+
+# Training feature order the scaler/model were fit on; the single-row
+# and batch paths both index by these positions.
+FEATURE_ORDER = ('UnitPrice', 'TotalPrice', 'Month', 'Hour', 'IsWeekend',
+                 'IsHolidaySeason', 'CustomerReturnRate', 'Category', 'Country')
+
+@st.fragment
+def render_prediction_section():
+    """Prediction card in its own fragment: a predict click reruns
+    only this block instead of the whole script."""
+    st.header("Enter Product & Order Details")
+
+    # st.form defers the rerun until the submit button is pressed, so
+    # tweaking individual inputs no longer re-executes the whole script.
+    with st.form(key="predict_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            category = st.selectbox("Product Category", options=cat_options, index=0)
+            unit_price = st.number_input("Unit Price (£)", min_value=0.0, max_value=500.0, value=5.0, step=0.5)
+            total_price = st.number_input("Approximate Total Order Value (£)", min_value=0.0, max_value=1000.0, value=50.0, step=5.0)
+            customer_return_rate = st.slider("Customer's Past Return Rate (%)", 0.0, 20.0, 1.7,
+                                             help="Historical return behavior of this customer")
+        with col2:
+            country = st.selectbox("Customer Country", options=country_options, index=0)
+            month = st.selectbox("Month of Purchase", options=MONTHS,
+                                 format_func=lambda x: MONTH_NAMES[x - 1])
+            is_holiday = st.checkbox("Holiday Season (Nov-Dec)", value=False)
+            is_weekend = st.checkbox("Weekend Order", value=False)
+
+        predict_clicked = st.form_submit_button("🔍 Predict Return Chance", type="primary", use_container_width=True)
+
+    if predict_clicked:
+        with st.spinner("Analyzing order details and predicting risk..."):
+            # Positions follow FEATURE_ORDER; Hour is a fixed midday default.
+            input_data = np.empty((1, len(FEATURE_ORDER)), dtype=np.float32)
+            input_data[0] = (unit_price, total_price, month, 12,
+                             int(is_weekend), int(is_holiday),
+                             customer_return_rate / 100,
+                             cat_map[category], country_map[country])
+            # Scale in place: the row buffer is fresh each click, so the two
+            # ufunc temporaries can be elided with out=.
+            np.multiply(input_data, inv_scale, out=input_data)
+            np.add(input_data, scale_bias, out=input_data)
+            return_probability = executor.submit(model.predict_proba, input_data).result()[0][1]
+
+        is_high = return_probability > 0.05
+
+        # One element per prediction: card + verdict + metrics grid.
+        tpl = HTML_HIGH_RISK if is_high else HTML_LOW_RISK
+        st.markdown(
+            "<br>" + tpl.format(prob=return_probability)
+            + (VERDICT_HIGH_HTML if is_high else VERDICT_LOW_HTML)
+            + METRICS_HTML,
+            unsafe_allow_html=True
+        )
+
+        if st.session_state.get("celebrations", False):
+            if is_high:
+                st.snow()
+            else:
+                st.balloons()
+
+
+render_prediction_section()
+
+
+# -----------------------------
+# Batch Prediction
+# -----------------------------
+st.markdown(
+    "<h2 style='text-align: center; color: #34d399;'>📂 Batch Predictions</h2>"
+    "<p style='text-align: center;'>Upload a CSV with the model's input columns to score many orders in one go.</p>",
+    unsafe_allow_html=True
+)
+
+uploaded = st.file_uploader("Batch CSV", type="csv")
+if uploaded is not None:
+    df_batch = pd.read_csv(uploaded)
+    # Vectorized encoding + one batched predict_proba call: XGBoost is
+    # internally vectorized, so scoring N rows at once amortizes all the
+    # per-call Python overhead instead of paying it N times in a loop.
+    df_batch['Category'] = df_batch['Category'].map(cat_map)
+    df_batch['Country'] = df_batch['Country'].map(country_map)
+    X = df_batch[list(FEATURE_ORDER)].to_numpy(dtype=np.float32)
+    X = X * inv_scale + scale_bias
+    # The booster is shared across sessions, so it stays at nthread=1
+    # here too: set_param while another session's predict is in flight
+    # is a race, and CSV uploads are small enough that single-threaded
+    # bulk scoring is still quick.
+    df_batch['ReturnProbability'] = model.predict_proba(X)[:, 1]
+    st.dataframe(df_batch, use_container_width=True, hide_index=True)
+
 
 # -----------------------------
 # Feedback Section
 # -----------------------------
-st.markdown("<h2 style='text-align: center; color: #34d399;'>📝 Give Your Feedback</h2>", unsafe_allow_html=True)
-st.write("Your feedback helps improve the model and user experience!")
+@st.fragment
+def render_feedback_form():
+    """Feedback card in its own fragment: submitting reruns only
+    this block; the table fragment refreshes itself."""
+    st.markdown(
+        "<h2 style='text-align: center; color: #34d399;'>📝 Give Your Feedback</h2>"
+        "<p style='text-align: center;'>Your feedback helps improve the model and user experience!</p>",
+        unsafe_allow_html=True
+    )
 
-with st.form(key="feedback_form", clear_on_submit=True):
-    name = st.text_input("Your Name *", placeholder="e.g., Umar Farooq")
+    with st.form(key="feedback_form", clear_on_submit=True):
+        name = st.text_input("Your Name *", placeholder="e.g., Umar Farooq")
     
-    colf1, colf2 = st.columns(2)
-    with colf1:
-        st.markdown("<p style='text-align:center; color:#94a3b8;'>Usability of the App</p>", unsafe_allow_html=True)
-        usability_rating = st_star_rating(
-            label="", 
-            maxValue=5, 
-            defaultValue=4, 
-            size=30, 
-            read_only=False,
-            key="usability_stars"
-        )
-    with colf2:
-        st.markdown("<p style='text-align:center; color:#94a3b8;'>Accuracy & Relevance of Prediction</p>", unsafe_allow_html=True)
-        accuracy_relevance = st_star_rating(
-            label="", 
-            maxValue=5, 
-            defaultValue=4, 
-            size=30, 
-            read_only=False,
-            key="accuracy_stars"
-        )
+        colf1, colf2 = st.columns(2)
+        with colf1:
+            st.markdown("<p style='text-align:center; color:#94a3b8;'>Usability of the App</p>", unsafe_allow_html=True)
+            usability_rating = st_star_rating(
+                label="", 
+                maxValue=5, 
+                defaultValue=4, 
+                size=30, 
+                read_only=False,
+                key="usability_stars"
+            )
+        with colf2:
+            st.markdown("<p style='text-align:center; color:#94a3b8;'>Accuracy & Relevance of Prediction</p>", unsafe_allow_html=True)
+            accuracy_relevance = st_star_rating(
+                label="", 
+                maxValue=5, 
+                defaultValue=4, 
+                size=30, 
+                read_only=False,
+                key="accuracy_stars"
+            )
     
-    suggestions = st.text_area(
-        "Suggestions for Improvement",
-        placeholder="e.g., Add product images, allow bulk upload, show explanations, etc."
-    )
-
-    submitted = st.form_submit_button("🚀 Submit Feedback", type="primary", use_container_width=True)
-
-    if submitted:
-        if not name.strip():
-            st.error("⚠️ Please enter your name.")
-        else:
-            feedback_entry = {
-                "Name": name,
-                "Usability_Rating": usability_rating,
-                "Accuracy_Relevance_Rating": accuracy_relevance,
-                "Suggestions": suggestions,
-                "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            try:
-                g = Github(st.secrets["GITHUB_TOKEN"])
-                repo = g.get_repo(f"{st.secrets['GITHUB_USERNAME']}/{st.secrets['REPO_NAME']}")
-                file_path = "feedback.csv"
-                branch = st.secrets.get("BRANCH", "main")
-
-                try:
-                    contents = repo.get_contents(file_path, ref=branch)
-                    raw_url = f"https://raw.githubusercontent.com/{st.secrets['GITHUB_USERNAME']}/{st.secrets['REPO_NAME']}/{branch}/{file_path}"
-                    df_existing = pd.read_csv(raw_url)
-                    df_updated = pd.concat([df_existing, pd.DataFrame([feedback_entry])], ignore_index=True)
-                except:
-                    df_updated = pd.DataFrame([feedback_entry])
-
-                csv_content = df_updated.to_csv(index=False)
-
-                if 'contents' in locals():
-                    repo.update_file(
-                        path=file_path,
-                        message=f"New feedback from {name}",
-                        content=csv_content,
-                        sha=contents.sha,
-                        branch=branch
-                    )
-                else:
-                    repo.create_file(
-                        path=file_path,
-                        message=f"Initial feedback from {name}",
-                        content=csv_content,
-                        branch=branch
-                    )
-
-                st.success(f"✅ Thank you, **{name}**! Your feedback has been recorded and saved to GitHub.")
-                st.balloons()
-                
-                # Force immediate refresh of the feedback table below
-                st.rerun()
+        suggestions = st.text_area(
+            "Suggestions for Improvement",
+            placeholder="e.g., Add product images, allow bulk upload, show explanations, etc."
+        )
 
-            except Exception as e:
-                st.error(f"Error saving feedback to GitHub: {str(e)}")
-                st.info("Feedback could not be saved permanently.")
+        submitted = st.form_submit_button("🚀 Submit Feedback", type="primary", use_container_width=True)
+
+        if submitted:
+            if not name.strip():
+                st.error("⚠️ Please enter your name.")
+            else:
+                feedback_entry = {
+                    "Name": name,
+                    "Usability_Rating": usability_rating,
+                    "Accuracy_Relevance_Rating": accuracy_relevance,
+                    "Suggestions": suggestions,
+                    "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                }
+                # Queue the row locally (O(1) insert, no network) and hand
+                # the GitHub round-trip to a background thread; any rows
+                # left over from a failed earlier flush go in the same batch.
+                conn = get_feedback_db()
+                conn.execute(
+                    "INSERT INTO pending_feedback(name, usability, accuracy, suggestions, ts) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (name, usability_rating, accuracy_relevance, suggestions,
+                     feedback_entry["Timestamp"])
+                )
+                conn.commit()
+                # Batch the uploads: one GitHub commit per
+                # FLUSH_BATCH_ROWS rows (or per FLUSH_MAX_AGE seconds),
+                # not one per submit.
+                _maybe_flush_feedback()
+
+                st.success(f"✅ Thank you, **{name}**! Your feedback has been recorded and will appear in the table shortly.")
+                if st.session_state.get("celebrations", False) and not st.session_state.get("balloons_shown"):
+                    st.balloons()
+                    st.session_state["balloons_shown"] = True
+                # No st.rerun(): the table fragment refreshes itself on
+                # its own cadence, and a full-script pass here would only
+                # wipe this success message.
+
+
+render_feedback_form()
 
-st.markdown("</div>", unsafe_allow_html=True)
 
 # -----------------------------
 # Feedback Table - Fetch Directly from GitHub (Always Latest)
 # -----------------------------
 st.markdown("<h2 style='text-align: center; color: #34d399;'>📊 All Submitted Feedbacks</h2>", unsafe_allow_html=True)
 
-feedback_placeholder = st.empty()
-
-with feedback_placeholder.container():
+@st.fragment(run_every="15s")
+def render_feedback_table():
+    """Feedback table in its own fragment: the periodic refresh reruns
+    just this block, not the whole script."""
+    # Age-based flush check rides the 15s tick, so a part-filled batch
+    # still reaches GitHub without waiting for another submission.
+    _maybe_flush_feedback()
     try:
-        g = Github(st.secrets["GITHUB_TOKEN"])
-        repo = g.get_repo(f"{st.secrets['GITHUB_USERNAME']}/{st.secrets['REPO_NAME']}")
-        branch = st.secrets.get("BRANCH", "main")
-        file_path = "feedback.csv"
-
         try:
-            contents = repo.get_contents(file_path, ref=branch)
-            import io
-            df_feedback = pd.read_csv(io.StringIO(contents.decoded_content.decode('utf-8')))
-            
+            df_feedback = load_feedback()
+
             st.dataframe(df_feedback, use_container_width=True, hide_index=True)
-            
-            csv_data = df_feedback.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="📥 Download Feedbacks as CSV",
-                data=csv_data,
-                file_name=f"feedbacks_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
+
+            # Serve the download straight from GitHub's CDN instead of
+            # buffering the CSV through the Streamlit websocket.
+            raw_url = (f"https://raw.githubusercontent.com/{st.secrets['GITHUB_USERNAME']}"
+                       f"/{st.secrets['REPO_NAME']}/{st.secrets.get('BRANCH', 'main')}/{FEEDBACK_FILE}")
+            st.link_button("📥 Download Feedbacks as CSV", raw_url, use_container_width=True)
         except:
             st.info("No feedback submitted yet.")
     except Exception as e:
         st.error(f"Unable to load feedback from GitHub: {e}")
 
-st.markdown("</div>", unsafe_allow_html=True)
+render_feedback_table()
+
 
 
 # -----------------------------
 # Footer
 # -----------------------------
-st.markdown("""
-    <div class='glass-card' style='text-align: center; padding: 1.5rem; margin-top: 3rem;'>
-        <p style='color: #94a3b8; font-size: 14px; margin:5px;'>
-            <strong>Data Science Assignment 4</strong> | BSCS-F22 | Instructor: Ghulam Ali<br>
-            Model: Linear Regression | Dataset: Online Retail (UCI/Kaggle)<br>
-            Deployment: Streamlit Cloud | Version 1.0 — December 2025
-        </p>
-    </div>
-""", unsafe_allow_html=True)
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
 
 
 